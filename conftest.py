@@ -7,6 +7,8 @@ from airflow.models import TaskInstance as TI
 from airflow.utils import timezone
 from airflow.utils.session import create_session
 
+from tests.operators.utils import reset_dag_runs
+
 DEFAULT_DATE = timezone.datetime(2016, 1, 1)
 
 
@@ -30,5 +32,4 @@ def create_database_connections():
 def sample_dag():
     yield DAG("test_dag", default_args={"owner": "airflow", "start_date": DEFAULT_DATE})
     with create_session() as session:
-        session.query(DagRun).delete()
-        session.query(TI).delete()
+        reset_dag_runs(session)
@@ -106,8 +106,8 @@ def run_raw_sql(
 def append(
     append_table: Table,
     main_table: Table,
-    columns: List[str] = [],
-    casted_columns: dict = {},
+    columns: Optional[List[str]] = None,
+    casted_columns: Optional[dict] = None,
     **kwargs,
 ):
     return SqlAppendOperator(
@@ -14,18 +14,29 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import itertools
 import os
+import tempfile
+import time
+from contextlib import contextmanager
+from functools import lru_cache, partial
 from typing import Optional
 from urllib.parse import urlparse
 
-import boto3
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import sqlalchemy
 from airflow.hooks.base import BaseHook
 from airflow.models import BaseOperator, DagRun, TaskInstance
 from airflow.providers.google.cloud.hooks.bigquery import BigQueryHook
 from airflow.providers.postgres.hooks.postgres import PostgresHook
-from google.cloud.storage import Client
+from google.cloud import bigquery
 from smart_open import open
+from smart_open.compression import get_supported_extensions
+from sqlalchemy.exc import NoSuchTableError
+from sqlalchemy.sql import sqltypes
 
 from astro.sql.operators.temp_hooks import TempSnowflakeHook
 from astro.sql.table import Table
@@ -33,6 +44,86 @@ from astro.utils.cloud_storage_creds import gcs_client, s3fs_creds
 from astro.utils.schema_util import get_table_name
 from astro.utils.task_id_helper import get_task_id
 
+# Number of rows pulled from the database and written to the file at a time.
+# Each chunk is written as one parquet row group.
+DEFAULT_CHUNK_SIZE = 100000
+# Seconds a SQLAlchemy engine is reused for before it is rebuilt.
+ENGINE_CACHE_TTL = 300
+# Statistics let parquet readers skip row groups on filters.
+PARQUET_WRITE_OPTIONS = dict(
+    compression="zstd",
+    compression_level=3,
+    use_dictionary=True,
+    data_page_size=1 << 20,
+    write_statistics=True,
+)
+CSV_WRITE_OPTIONS = pa_csv.WriteOptions(
+    include_header=True, batch_size=65536, quoting_style="needed"
+)
+# Formats BigQuery can export to GCS by itself.
+BIGQUERY_EXPORT_FORMATS = {
+    "csv": "CSV",
+    "ndjson": "NEWLINE_DELIMITED_JSON",
+    "parquet": "PARQUET",
+}
+# BigQuery exports at most 1GB of table data to a single file.
+BIGQUERY_SINGLE_FILE_EXPORT_LIMIT = 1024 * 1024 * 1024
+# BigQuery can only gzip csv and ndjson exports, and only as a whole file.
+BIGQUERY_GZIP_EXPORT_FORMATS = ("csv", "ndjson")
+# Files are written through a large buffer to reduce the number of write calls.
+WRITE_BUFFER_SIZE = 1024 * 1024
+# S3 files are uploaded in parts of 16MB, several at a time.
+S3_TRANSFER_SETTINGS = dict(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=16 * 1024 * 1024,
+    max_concurrency=10,
+    use_threads=True,
+)
+
+
+@lru_cache(maxsize=32)
+def _get_engine(conn_type, conn_id, database, schema, warehouse, ttl_bucket):
+    """Build SQLAlchemy engine for `conn_id`, reused by tasks in the same worker.
+
+    `ttl_bucket` only takes part in the cache key, so that a new engine is built
+    from the connection as it is then every ENGINE_CACHE_TTL seconds.
+    """
+    # Select database Hook based on `conn` type, only building the one needed
+    hook_factories = {
+        "postgres": lambda: PostgresHook(postgres_conn_id=conn_id, schema=database),
+        "snowflake": lambda: TempSnowflakeHook(
+            snowflake_conn_id=conn_id,
+            database=database,
+            schema=schema,
+            warehouse=warehouse,
+        ),
+        "bigquery": lambda: BigQueryHook(use_legacy_sql=False, gcp_conn_id=conn_id),
+    }
+    hook = hook_factories[conn_type]()
+    return hook.get_sqlalchemy_engine(
+        engine_kwargs={
+            # On BigQuery every ping is a query job
+            "pool_pre_ping": conn_type != "bigquery",
+            "pool_size": 1,
+        }
+    )
+
+
+def get_engine(table, conn_type):
+    """Get the SQLAlchemy engine for the database holding `table`.
+
+    Engines are cached for up to ENGINE_CACHE_TTL seconds, so that edited
+    connections and rotated credentials are picked up.
+    """
+    return _get_engine(
+        conn_type,
+        table.conn_id,
+        table.database,
+        table.schema,
+        table.warehouse,
+        int(time.monotonic() // ENGINE_CACHE_TTL),
+    )
+
 
 class SaveFile(BaseOperator):
     """Write SQL table to csv/parquet on local/S3/GCS.
@@ -49,6 +140,8 @@ class SaveFile(BaseOperator):
     :type overwrite: bool
     :param output_file_format: file formats, valid values csv/parquet. Default: 'csv'.
     :type output_file_format: str
+    :param chunksize: Number of rows read from the database and written at a time.
+    :type chunksize: int
     """
 
     def __init__(
@@ -59,6 +152,7 @@ class SaveFile(BaseOperator):
         output_conn_id=None,
         output_file_format="csv",
         overwrite=None,
+        chunksize=DEFAULT_CHUNK_SIZE,
         **kwargs,
     ) -> None:
         super().__init__(**kwargs)
@@ -68,6 +162,7 @@ class SaveFile(BaseOperator):
         self.output_conn_id = output_conn_id
         self.overwrite = overwrite
         self.output_file_format = output_file_format
+        self.chunksize = chunksize
         self.kwargs = kwargs
 
     def execute(self, context):
@@ -80,76 +175,168 @@ class SaveFile(BaseOperator):
         input_table = self.input_table
         conn_type = BaseHook.get_connection(input_table.conn_id).conn_type
 
-        # Select database Hook based on `conn` type
-        input_hook = {
-            "postgres": PostgresHook(
-                postgres_conn_id=input_table.conn_id, schema=input_table.database
-            ),
-            "snowflake": TempSnowflakeHook(
-                snowflake_conn_id=input_table.conn_id,
-                database=input_table.database,
-                schema=input_table.schema,
-                warehouse=input_table.warehouse,
-            ),
-            "bigquery": BigQueryHook(
-                use_legacy_sql=False, gcp_conn_id=input_table.conn_id
-            ),
-        }.get(conn_type, None)
-
-        # Load table from SQL db.
-        df = pd.read_sql(
-            f"SELECT * FROM {get_table_name(input_table)}",
-            con=input_hook.get_sqlalchemy_engine(),
-        )
+        table_name = get_table_name(input_table)
+        # Shared by the existence check and the write, to fetch credentials once.
+        transport_params = get_transport_params(self.output_file_path)
 
-        # Write file if overwrite == True or if file doesn't exist.
-        if self.overwrite == True or not self.file_exists(
-            self.output_file_path, self.output_conn_id
+        # Write file if overwrite is set or if file doesn't exist. Skipping the
+        # existence check when overwriting saves a remote metadata request.
+        if self.overwrite or not self.file_exists(
+            self.output_file_path, self.output_conn_id, transport_params
         ):
-            self.agnostic_write_file(df, self.output_file_path, self.output_conn_id)
+            self.write_table(input_table, conn_type, table_name, transport_params)
         else:
             raise FileExistsError
 
-    def file_exists(self, output_file_path, output_conn_id=None):
-        transport_params = {
-            "s3": s3fs_creds,
-            "gs": gcs_client,
-            "": lambda: None,
-        }[urlparse(output_file_path).scheme]()
+    def write_table(self, input_table, conn_type, table_name, transport_params):
+        """Write SQL table to the output file, letting the database do it if it can.
+
+        The SQLAlchemy engine is only built when rows are read through it.
+        """
+        if conn_type == "postgres" and self.output_file_format == "csv":
+            # Let the server serialise the table, bypassing pandas.
+            self.postgres_copy_to_file(
+                get_engine(input_table, conn_type),
+                table_name,
+                self.output_file_path,
+                transport_params,
+            )
+            return
+        if (
+            conn_type == "bigquery"
+            and urlparse(self.output_file_path).scheme == "gs"
+            and self.output_file_format in BIGQUERY_EXPORT_FORMATS
+            and self.bigquery_export_to_gcs(
+                input_table.conn_id, table_name, self.output_file_path
+            )
+        ):
+            # BigQuery wrote the file to GCS, bypassing this worker.
+            return
+
+        engine = get_engine(input_table, conn_type)
+        column_types = None
+        if self.output_file_format in ("parquet", "csv"):
+            # Written through Arrow, which needs one schema for all chunks.
+            column_types = get_arrow_column_types(engine, table_name)
+        # Load table from SQL db, one chunk at a time. A server-side cursor
+        # keeps drivers like psycopg2 from fetching all rows up front.
+        with engine.connect() as connection:
+            df_chunks = pd.read_sql(
+                f"SELECT * FROM {table_name}",
+                con=connection.execution_options(stream_results=True),
+                chunksize=self.chunksize,
+            )
+            self.agnostic_write_file(
+                df_chunks,
+                self.output_file_path,
+                self.output_conn_id,
+                transport_params,
+                column_types,
+            )
+
+    def file_exists(self, output_file_path, output_conn_id=None, transport_params=None):
+        """Check if file exists using object metadata, without reading it."""
+        url = urlparse(output_file_path)
+        if transport_params is None:
+            transport_params = get_transport_params(output_file_path)
+        if url.scheme == "s3":
+            client = transport_params["client"]
+            try:
+                client.head_object(Bucket=url.netloc, Key=url.path.lstrip("/"))
+            except client.exceptions.ClientError as error:
+                if error.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                    return False
+                raise
+            return True
+        elif url.scheme == "gs":
+            client = transport_params["client"]
+            return client.bucket(url.netloc).blob(url.path.lstrip("/")).exists()
+        return os.path.exists(output_file_path)
+
+    def postgres_copy_to_file(
+        self, engine, table_name, output_file_path, transport_params=None
+    ):
+        """Write Postgres table to csv with ``COPY ... TO STDOUT``.
+
+        Rows are streamed from the server straight into the output file, so the
+        table is never loaded into memory.
+        """
+        if transport_params is None:
+            transport_params = get_transport_params(output_file_path)
+
+        conn = engine.raw_connection()
         try:
-            with open(output_file_path, mode="r", transport_params=transport_params):
-                return True
-        except IOError:
+            with open_output_file(
+                output_file_path, transport_params
+            ) as stream, conn.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY (SELECT * FROM {table_name}) TO STDOUT WITH (FORMAT CSV, HEADER)",
+                    stream,
+                )
+        finally:
+            conn.close()
+
+    def bigquery_export_to_gcs(self, conn_id, table_name, output_file_path):
+        """Write BigQuery table to GCS with an extract job.
+
+        The file is written by BigQuery itself, so no rows are read here.
+        Returns False, without exporting, when BigQuery cannot write the file
+        SaveFile would: for views and other non-table types, tables over 1GB,
+        csv files of tables with RECORD or REPEATED columns and compressed
+        files other than gzipped csv or ndjson.
+        """
+        hook = BigQueryHook(use_legacy_sql=False, gcp_conn_id=conn_id)
+        client = hook.get_client(project_id=hook.project_id)
+        table = client.get_table(table_name)
+        if table.table_type != "TABLE":
+            return False
+        if (
+            table.num_bytes is None
+            or table.num_bytes > BIGQUERY_SINGLE_FILE_EXPORT_LIMIT
+        ):
             return False
+        if self.output_file_format == "csv" and has_nested_fields(table.schema):
+            return False
+        job_config = bigquery.ExtractJobConfig(
+            destination_format=BIGQUERY_EXPORT_FORMATS[self.output_file_format]
+        )
+        extension = os.path.splitext(urlparse(output_file_path).path)[1].lower()
+        if extension in get_supported_extensions():
+            if (
+                extension != ".gz"
+                or self.output_file_format not in BIGQUERY_GZIP_EXPORT_FORMATS
+            ):
+                return False
+            job_config.compression = "GZIP"
+        client.extract_table(
+            table_name, output_file_path, job_config=job_config
+        ).result()
+        return True
 
-    def agnostic_write_file(self, df, output_file_path, output_conn_id=None):
-        """Write dataframe to csv/parquet files formats
+    def agnostic_write_file(
+        self,
+        df_chunks,
+        output_file_path,
+        output_conn_id=None,
+        transport_params=None,
+        column_types=None,
+    ):
+        """Write dataframe chunks to csv/parquet files formats
 
         Select output file format based on param output_file_format to class.
+        Chunks are written as they are read, so only one is held in memory.
         """
-        transport_params = {
-            "s3": s3fs_creds,
-            "gs": gcs_client,
-            "": lambda: None,
-        }[urlparse(output_file_path).scheme]()
+        if transport_params is None:
+            transport_params = get_transport_params(output_file_path)
 
         serialiser = {
-            "parquet": df.to_parquet,
-            "csv": df.to_csv,
-            "json": df.to_json,
-            "ndjson": df.to_json,
-        }
-        serialiser_params = {
-            "csv": {"index": False},
-            "json": {"orient": "records"},
-            "ndjson": {"orient": "records", "lines": True},
+            "parquet": partial(write_parquet_chunks, column_types=column_types),
+            "csv": partial(write_csv_chunks, column_types=column_types),
+            "json": write_json_chunks,
+            "ndjson": write_ndjson_chunks,
         }
-        with open(
-            output_file_path, mode="wb", transport_params=transport_params
-        ) as stream:
-            serialiser[self.output_file_format](
-                stream, **serialiser_params.get(self.output_file_format, {})
-            )
+        with open_output_file(output_file_path, transport_params) as stream:
+            serialiser[self.output_file_format](df_chunks, stream)
 
     @staticmethod
     def create_table_name(context):
@@ -158,6 +345,231 @@ class SaveFile(BaseOperator):
         return f"{dag_run.dag_id}_{ti.task_id}_{dag_run.id}"
 
 
+def get_transport_params(output_file_path):
+    """Get smart_open transport params, including credentials, for the file's scheme."""
+    return {
+        "s3": s3fs_creds,
+        "gs": gcs_client,
+        "": lambda: None,
+    }[urlparse(output_file_path).scheme]()
+
+
+@contextmanager
+def open_output_file(output_file_path, transport_params):
+    """Open file on local/S3/GCS for binary writing.
+
+    As with smart_open, the file is compressed if its extension asks for it
+    (e.g. ``.gz``). S3 files are written to a local temporary file first and
+    uploaded on exit, so that the upload can send multiple parts concurrently.
+    GCS files are streamed by smart_open.
+    """
+    url = urlparse(output_file_path)
+    if url.scheme != "s3":
+        with open(
+            output_file_path,
+            mode="wb",
+            buffering=WRITE_BUFFER_SIZE,
+            transport_params=transport_params,
+        ) as stream:
+            yield stream
+        return
+
+    from boto3.s3.transfer import TransferConfig
+
+    key = url.path.lstrip("/")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Keep the key's file name, so that smart_open applies the same compression.
+        local_path = os.path.join(tmp_dir, os.path.basename(key))
+        with open(local_path, mode="wb", buffering=WRITE_BUFFER_SIZE) as stream:
+            yield stream
+        transport_params["client"].upload_file(
+            local_path,
+            url.netloc,
+            key,
+            Config=TransferConfig(**S3_TRANSFER_SETTINGS),
+        )
+
+
+def has_nested_fields(schema):
+    """Check if a BigQuery table schema has RECORD or REPEATED columns, which csv cannot hold."""
+    return any(
+        field.field_type in ("RECORD", "STRUCT") or field.mode == "REPEATED"
+        for field in schema
+    )
+
+
+def get_arrow_column_types(engine, table_name):
+    """Get Arrow types of the table's columns, from their SQL types.
+
+    Columns whose SQL type has no obvious Arrow counterpart (e.g. JSON, ARRAY
+    or BigQuery RECORD) are left out.
+
+    :param engine: SQLAlchemy engine of the database holding the table
+    :param table_name: table name as used in queries, optionally schema-qualified and quoted
+    """
+    schema, _, name = table_name.rpartition(".")
+    try:
+        columns = sqlalchemy.inspect(engine).get_columns(
+            name.strip('"`'), schema=schema.strip('"`') or None
+        )
+    except NoSuchTableError:
+        return {}
+    column_types = {}
+    for column in columns:
+        arrow_type = to_arrow_type(column["type"])
+        if arrow_type is not None:
+            column_types[column["name"]] = arrow_type
+    return column_types
+
+
+def to_arrow_type(sql_type):
+    """Map a SQLAlchemy type to the Arrow type of the values pandas reads for it."""
+    if isinstance(sql_type, sqltypes.Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, sqltypes.Integer):
+        return pa.int64()
+    if isinstance(sql_type, sqltypes.Numeric):
+        # `pd.read_sql` coerces decimals to floats
+        if not isinstance(sql_type, sqltypes.Float) and sql_type.scale == 0:
+            return pa.int64()
+        return pa.float64()
+    if isinstance(sql_type, sqltypes.String):
+        return pa.string()
+    if isinstance(sql_type, sqltypes.DateTime):
+        return pa.timestamp("us", tz="UTC" if sql_type.timezone else None)
+    if isinstance(sql_type, sqltypes.Date):
+        return pa.date32()
+    return None
+
+
+def peek_chunks(df_chunks):
+    """Get the first of ``df_chunks``, and an iterator over all of them."""
+    df_chunks = iter(df_chunks)
+    first_df = next(df_chunks, None)
+    if first_df is None:
+        return None, df_chunks
+    return first_df, itertools.chain([first_df], df_chunks)
+
+
+def has_arrow_types(df, column_types):
+    """Check if every column of ``df`` has an Arrow type from its SQL type.
+
+    Other columns only get a type from their values, which may differ between
+    chunks, e.g. NULL in the first chunk and a struct in a later one.
+    """
+    return bool(column_types) and all(name in column_types for name in df.columns)
+
+
+def to_arrow_tables(df_chunks, column_types):
+    """Convert dataframe chunks to Arrow tables with the types in ``column_types``.
+
+    Types inferred from one chunk alone are unreliable, e.g. a column that is
+    all NULL in the first chunk would get Arrow's ``null`` type, which no later
+    value can be cast to.
+
+    :param df_chunks: iterable of dataframes with the same columns
+    :param column_types: Arrow types of every column, from ``get_arrow_column_types``
+    """
+    schema = None
+    for df in df_chunks:
+        if schema is None:
+            schema = pa.schema([(name, column_types[name]) for name in df.columns])
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if not table.schema.equals(schema, check_metadata=False):
+            table = table.cast(schema)
+        yield table
+
+
+def write_parquet_chunks(df_chunks, stream, column_types=None):
+    """Write dataframe chunks to a single zstd-compressed parquet file.
+
+    Tables with columns of unknown type are read whole and typed by pyarrow
+    from all their values, as chunks could disagree on the type.
+    """
+    first_df, df_chunks = peek_chunks(df_chunks)
+    if first_df is None:
+        return
+    if not has_arrow_types(first_df, column_types):
+        df = pd.concat(df_chunks, ignore_index=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, stream, **PARQUET_WRITE_OPTIONS)
+        return
+
+    writer = None
+    try:
+        for table in to_arrow_tables(df_chunks, column_types):
+            if writer is None:
+                writer = pq.ParquetWriter(stream, table.schema, **PARQUET_WRITE_OPTIONS)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_csv_chunks(df_chunks, stream, column_types=None):
+    """Write dataframe chunks to csv with Arrow's multi-threaded writer.
+
+    Arrow's csv differs from pandas' ``to_csv`` in a few ways: the header and
+    string values are quoted, booleans are written as ``true``/``false`` and
+    timestamps always have fractional seconds. Tables with columns that have
+    no Arrow type from their SQL type are written by pandas instead, as such
+    columns may hold nested values (e.g. BigQuery RECORD or Snowflake VARIANT)
+    in any chunk, which Arrow cannot write to csv.
+    """
+    first_df, df_chunks = peek_chunks(df_chunks)
+    if first_df is None:
+        return
+    if not has_arrow_types(first_df, column_types):
+        write_csv_chunks_with_pandas(df_chunks, stream)
+        return
+
+    writer = None
+    try:
+        for table in to_arrow_tables(df_chunks, column_types):
+            if writer is None:
+                writer = pa_csv.CSVWriter(
+                    stream, table.schema, write_options=CSV_WRITE_OPTIONS
+                )
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_csv_chunks_with_pandas(df_chunks, stream):
+    """Write dataframe chunks to csv with pandas, writing the header once."""
+    header = True
+    for df in df_chunks:
+        stream.write(df.to_csv(index=False, header=header).encode("utf-8"))
+        header = False
+
+
+def write_json_chunks(df_chunks, stream):
+    """Write dataframe chunks as a single JSON array of records."""
+    separator = b""
+    stream.write(b"[")
+    for df in df_chunks:
+        if df.empty:
+            continue
+        # Strip the brackets of each chunk's array, without copying the bytes.
+        records = memoryview(df.to_json(orient="records").encode("utf-8"))[1:-1]
+        stream.write(separator)
+        stream.write(records)
+        separator = b","
+    stream.write(b"]")
+
+
+def write_ndjson_chunks(df_chunks, stream):
+    for df in df_chunks:
+        if df.empty:
+            continue
+        records = df.to_json(orient="records", lines=True).encode("utf-8")
+        stream.write(records)
+        # Older pandas versions don't end the last line with a newline.
+        if not records.endswith(b"\n"):
+            stream.write(b"\n")
+
+
 def save_file(
     output_file_path,
     table=None,
@@ -165,6 +577,7 @@ def save_file(
     output_conn_id=None,
     overwrite=False,
     output_file_format="csv",
+    chunksize=DEFAULT_CHUNK_SIZE,
     task_id=None,
     **kwargs,
 ):
@@ -182,6 +595,8 @@ def save_file(
     :type output_conn_id: str
     :param overwrite: Overwrite file if exists. Default False.
     :type overwrite: bool
+    :param chunksize: Number of rows read from the database and written at a time.
+    :type chunksize: int
     :param task_id: task id, optional.
     :type task_id: str
     """
@@ -198,4 +613,5 @@ def save_file(
         output_conn_id=output_conn_id,
         overwrite=overwrite,
         output_file_format=output_file_format,
+        chunksize=chunksize,
     ).output
@@ -14,11 +14,11 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import importlib
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import MetaData, cast, column, insert, select
-from sqlalchemy.sql.schema import Table as SqlaTable
+import sqlalchemy
+from sqlalchemy import cast, column, insert, inspect, select, table
 
 from astro.sql.operators.sql_decorator import SqlDecoratoratedOperator
 from astro.sql.table import Table
@@ -26,6 +26,38 @@ from astro.utils.schema_util import get_table_name
 from astro.utils.task_id_helper import get_unique_task_id
 
 
+def get_table_columns(engine, table_name: str) -> List[str]:
+    # Only the column names are needed, skip reflecting keys and indexes.
+    return [c["name"] for c in inspect(engine).get_columns(table_name)]
+
+
+@lru_cache(maxsize=64)
+def build_append_statement(
+    main_table_name: str,
+    columns: Tuple[str, ...],
+    casted_columns: Tuple[Tuple[str, str], ...],
+    append_table_name: str,
+):
+    """Build ``INSERT INTO main SELECT ... FROM append`` for the given columns.
+
+    :param main_table_name: table rows are inserted into
+    :param columns: names of columns copied as they are
+    :param casted_columns: (name, SQLAlchemy type name) of columns copied with a cast
+    :param append_table_name: table rows are selected from
+    """
+    column_names = [column(c) for c in columns]
+    column_names.extend(
+        cast(column(k), getattr(sqlalchemy, v)) for k, v in casted_columns
+    )
+    # Insert into the columns in the same order they are selected.
+    main_columns = [*columns, *(k for k, _ in casted_columns)]
+
+    append_table_sqla = table(append_table_name)
+    main_table_sqla = table(main_table_name, *[column(c) for c in main_columns])
+    sel = select(column_names).select_from(append_table_sqla)
+    return insert(main_table_sqla).from_select(main_columns, sel)
+
+
 class SqlAppendOperator(SqlDecoratoratedOperator):
     template_fields = ("main_table", "append_table")
 
@@ -33,16 +65,16 @@ class SqlAppendOperator(SqlDecoratoratedOperator):
         self,
         append_table: Table,
         main_table: Table,
-        columns: List[str] = [],
-        casted_columns: dict = {},
+        columns: Optional[List[str]] = None,
+        casted_columns: Optional[dict] = None,
         **kwargs,
     ):
         self.append_table = append_table
         self.main_table = main_table
         self.sql = ""
 
-        self.columns = columns
-        self.casted_columns = casted_columns
+        self.columns = columns or []
+        self.casted_columns = casted_columns or {}
         task_id = get_unique_task_id("append_table")
 
         def null_function():
@@ -75,28 +107,14 @@ class SqlAppendOperator(SqlDecoratoratedOperator):
     def append(
         self, main_table: Table, columns, casted_columns, append_table: Table, conn_id
     ):
-        engine = self.get_sql_alchemy_engine()
-        metadata = MetaData()
-        # TO Do - fix bigquery and postgres reflection table issue.
-        main_table_sqla = SqlaTable(
-            get_table_name(main_table), metadata, autoload_with=engine
+        append_table_name = get_table_name(append_table)
+        if not columns and not casted_columns:
+            # Reflected on every run, so columns added to the append table are copied.
+            engine = self.get_sql_alchemy_engine()
+            columns = get_table_columns(engine, append_table_name)
+        return build_append_statement(
+            get_table_name(main_table),
+            tuple(columns),
+            tuple(casted_columns.items()),
+            append_table_name,
         )
-        append_table_sqla = SqlaTable(
-            get_table_name(append_table), metadata, autoload_with=engine
-        )
-
-        column_names = [column(c) for c in columns]
-        sqlalchemy = importlib.import_module("sqlalchemy")
-        casted_fields = [
-            cast(column(k), getattr(sqlalchemy, v)) for k, v in casted_columns.items()
-        ]
-        main_columns = [k for k, v in casted_columns.items()]
-        main_columns.extend([c for c in columns])
-
-        if len(column_names) + len(casted_fields) == 0:
-            column_names = [column(c) for c in append_table_sqla.c.keys()]
-            main_columns = column_names
-
-        column_names.extend(casted_fields)
-        sel = select(column_names).select_from(append_table_sqla)
-        return insert(main_table_sqla).from_select(main_columns, sel)
@@ -1,6 +1,8 @@
+import copy
 import os
 import re
 from collections import defaultdict
+from functools import lru_cache
 from typing import Dict
 
 import frontmatter
@@ -12,43 +14,32 @@ from airflow.models.xcom_arg import XComArg
 from astro.sql.operators.sql_decorator import SqlDecoratoratedOperator
 from astro.sql.table import Table, TempTable
 
+TEMPLATED_FIELD_PATTERN = re.compile(r"\{[^}]*\}")
+
 
 @task_group()
 def render(path, **kwargs):
-    # raise AirflowException(f"Failed because cwd is {os.listdir(path)}, {os.}")
-    files = [
-        f
-        for f in os.listdir(path)
-        if os.path.isfile(os.path.join(path, f)) and f.endswith(".sql")
-    ]
+    files = []
     template_dict = kwargs
     op_kwargs = {}
     # Parse all of the SQL files in this directory
-    for filename in files:
-        with open(os.path.join(path, filename), "r") as f:
-            front_matter_opts = frontmatter.loads(f.read()).to_dict()
-            sql = front_matter_opts.pop("content")
-            templated_names = find_templated_fields(sql)
-            parameters = {y: None for y in templated_names}
-            if front_matter_opts.get("template_vars"):
-                template_variables = front_matter_opts.pop("template_vars")
-                sql = wrap_template_variables(sql, template_variables)
-                parameters.update({v: None for k, v in template_variables.items()})
-            if front_matter_opts.get("output_table"):
-                out_table_dict = front_matter_opts.pop("output_table")
-                if out_table_dict.get("table_name"):
-                    op_kwargs = {"output_table": Table(**out_table_dict)}
-                else:
-                    op_kwargs = {"output_table": TempTable(**out_table_dict)}
-
-            p = ParsedSqlOperator(
-                sql=sql,
-                parameters=parameters,
-                file_name=filename,
-                op_kwargs=op_kwargs,
-                **front_matter_opts,
-            )
-            template_dict[filename.replace(".sql", "")] = p.output
+    for filename, file_string in _read_sql_files(path):
+        sql, parameter_names, out_table_dict, options = _parse_sql_file(file_string)
+        files.append(filename)
+        if out_table_dict:
+            if out_table_dict.get("table_name"):
+                op_kwargs = {"output_table": Table(**out_table_dict)}
+            else:
+                op_kwargs = {"output_table": TempTable(**out_table_dict)}
+
+        p = ParsedSqlOperator(
+            sql=sql,
+            parameters=dict.fromkeys(parameter_names),
+            file_name=filename,
+            op_kwargs=op_kwargs,
+            **copy.deepcopy(options),
+        )
+        template_dict[filename.replace(".sql", "")] = p.output
 
     # Add the XComArg to the parameters to create dependency
     for filename in files:
@@ -68,8 +59,40 @@ def render(path, **kwargs):
     return template_dict
 
 
+def _read_sql_files(path):
+    """Names and text of the SQL files in ``path``, sorted by name."""
+    sql_files = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.endswith(".sql") and entry.is_file():
+                with open(entry.path, "r") as f:
+                    sql_files.append((entry.name, f.read()))
+    return sorted(sql_files)
+
+
+@lru_cache(maxsize=256)
+def _parse_sql_file(file_string):
+    """Parse a SQL file's front matter and SQL, without creating any operators.
+
+    The result is cached on the file text, so callers must copy anything they mutate.
+    """
+    front_matter_opts = frontmatter.loads(file_string).to_dict()
+    sql = front_matter_opts.pop("content")
+    parameters = {y: None for y in find_templated_fields(sql)}
+    if front_matter_opts.get("template_vars"):
+        template_variables = front_matter_opts.pop("template_vars")
+        sql = wrap_template_variables(sql, template_variables)
+        parameters.update({v: None for k, v in template_variables.items()})
+    out_table_dict = None
+    if front_matter_opts.get("output_table"):
+        out_table_dict = front_matter_opts.pop("output_table")
+    return sql, tuple(parameters), out_table_dict, front_matter_opts
+
+
 def find_templated_fields(file_string):
-    return [y[1:-1] for y in re.findall(r"\{[^}]*\}", file_string) if "{{" not in y]
+    return [
+        y[1:-1] for y in TEMPLATED_FIELD_PATTERN.findall(file_string) if "{{" not in y
+    ]
 
 
 def wrap_template_variables(sql, template_vars):
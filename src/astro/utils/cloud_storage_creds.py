@@ -1,9 +1,6 @@
 import os
 from urllib import parse
 
-import boto3
-from google.cloud.storage import Client
-
 
 def parse_s3_env_var():
     raw_data = (
@@ -22,6 +19,7 @@ def s3fs_creds():
     s3fs enables pandas to write to s3
     """
     # To-do: clean-up how S3 creds are passed to s3fs
+    import boto3
 
     k, v = parse_s3_env_var()
     session = boto3.Session(
@@ -35,5 +33,7 @@ def gcs_client():
     """
     get GCS credentials for storage.
     """
+    from google.cloud.storage import Client
+
     client = Client()
     return dict(client=client)
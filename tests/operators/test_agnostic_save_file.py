@@ -24,16 +24,21 @@ Run test:
 
 """
 import copy
+import gzip
+import io
 import logging
 import os
 import pathlib
+import shutil
 import tempfile
 import unittest.mock
 from pathlib import Path
 
 import boto3
 import pandas as pd
+import pyarrow as pa
 import pytest
+import sqlalchemy
 from airflow.models import DAG, DagRun
 from airflow.models import TaskInstance as TI
 from airflow.providers.google.cloud.hooks.bigquery import BigQueryHook
@@ -46,7 +51,14 @@ from airflow.utils.types import DagRunType
 import astro.sql as aql
 
 # Import Operator
-from astro.sql.operators.agnostic_save_file import save_file
+from astro.sql.operators.agnostic_save_file import (
+    SaveFile,
+    get_arrow_column_types,
+    open_output_file,
+    save_file,
+    write_csv_chunks,
+    write_parquet_chunks,
+)
 from astro.sql.table import Table
 from tests.operators import utils as test_utils
 
@@ -373,3 +385,221 @@ def test_save_file(sample_dag, sql_server, file_type):
             [{"id": 1, "name": "Someone"}, {"id": 2, "name": "Alguém"}]
         )
         assert df.rename(columns=str.lower).equals(expected)
+
+
+@pytest.fixture
+def postgres_table_with_nulls():
+    hook = PostgresHook(postgres_conn_id="postgres_conn")
+    hook.run(f"DROP TABLE IF EXISTS {INPUT_TABLE_NAME}")
+    hook.run(
+        f"CREATE TABLE {INPUT_TABLE_NAME} (id int, name varchar(255), score real);"
+    )
+    hook.run(f"INSERT INTO {INPUT_TABLE_NAME} (id, name, score) VALUES (1, NULL, 1);")
+    hook.run(
+        f"INSERT INTO {INPUT_TABLE_NAME} (id, name, score) VALUES (2, 'Someone', 1.5);"
+    )
+    yield
+    hook.run(f"DROP TABLE IF EXISTS {INPUT_TABLE_NAME}")
+
+
+@pytest.mark.parametrize("file_type", ["ndjson", "json", "csv", "parquet"])
+def test_save_file_in_chunks(sample_dag, postgres_table_with_nulls, file_type):
+    """Save a table with a NULL-then-value column, one row per chunk.
+
+    Postgres csv is written by COPY, see the write_*_chunks tests for csv chunks.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = Path(tmp_dir, f"sample.{file_type}")
+
+        task_params = {
+            "input_table": Table(table_name=INPUT_TABLE_NAME, conn_id="postgres_conn"),
+            "output_file_path": str(filepath),
+            "output_file_format": file_type,
+            "output_conn_id": None,
+            "overwrite": False,
+            "chunksize": 1,
+        }
+        test_utils.create_and_run_task(sample_dag, save_file, (), task_params)
+        df = load_to_dataframe(filepath, file_type)
+        assert df["id"].tolist() == [1, 2]
+        assert pd.isna(df["name"][0])
+        assert df["name"][1] == "Someone"
+        assert df["score"].tolist() == [1, 1.5]
+
+
+def test_file_exists_local(tmp_path):
+    operator = SaveFile(task_id="save_file")
+    filepath = str(tmp_path / "output.csv")
+    assert not operator.file_exists(filepath)
+
+    open(filepath, "a").close()
+    assert operator.file_exists(filepath)
+
+
+def test_open_output_file_compresses_s3_by_extension(tmp_path):
+    uploaded = tmp_path / "uploaded.csv.gz"
+    client = unittest.mock.Mock()
+    client.upload_file.side_effect = lambda path, *args, **kwargs: shutil.copy(
+        path, uploaded
+    )
+
+    with open_output_file("s3://tmp9/out.csv.gz", {"client": client}) as stream:
+        stream.write(b"id,name\n1,Someone\n")
+
+    assert client.upload_file.call_args[0][1:3] == ("tmp9", "out.csv.gz")
+    with gzip.open(uploaded) as fp:
+        assert fp.read() == b"id,name\n1,Someone\n"
+
+
+def write_csv_to_dataframe(df_chunks, column_types):
+    stream = io.BytesIO()
+    write_csv_chunks(df_chunks, stream, column_types)
+    return pd.read_csv(io.BytesIO(stream.getvalue()))
+
+
+def test_write_csv_chunks_null_first_with_column_types():
+    df_chunks = [
+        pd.DataFrame([{"id": 1, "name": None}]),
+        pd.DataFrame([{"id": 2, "name": "Someone"}]),
+    ]
+    column_types = {"id": pa.int64(), "name": pa.string()}
+
+    df = write_csv_to_dataframe(df_chunks, column_types)
+    assert df["id"].tolist() == [1, 2]
+    assert pd.isna(df["name"][0])
+    assert df["name"][1] == "Someone"
+
+
+def test_write_csv_chunks_unmapped_null_first():
+    # e.g. a BigQuery RECORD column, NULL in the first chunk and nested later
+    df_chunks = [
+        pd.DataFrame([{"id": 1, "record": None}]),
+        pd.DataFrame([{"id": 2, "record": {"name": "Alguém"}}]),
+    ]
+
+    df = write_csv_to_dataframe(df_chunks, {"id": pa.int64()})
+    assert df["id"].tolist() == [1, 2]
+    assert pd.isna(df["record"][0])
+    assert df["record"][1] == "{'name': 'Alguém'}"
+
+
+def make_bigquery_table(num_bytes=1024, table_type="TABLE", fields=()):
+    """Mock a BigQuery table with ``fields`` given as (field_type, mode) pairs."""
+    schema = [
+        unittest.mock.Mock(field_type=field_type, mode=mode)
+        for field_type, mode in fields
+    ]
+    return unittest.mock.Mock(num_bytes=num_bytes, table_type=table_type, schema=schema)
+
+
+@pytest.mark.parametrize(
+    "table,output_file_format,output_file_path,exported",
+    [
+        (make_bigquery_table(), "csv", "gs://foo/a.csv", True),
+        (
+            make_bigquery_table(num_bytes=2 * 1024 * 1024 * 1024),
+            "csv",
+            "gs://foo/a.csv",
+            False,
+        ),
+        (make_bigquery_table(num_bytes=None), "csv", "gs://foo/a.csv", False),
+        (make_bigquery_table(table_type="VIEW"), "csv", "gs://foo/a.csv", False),
+        (
+            make_bigquery_table(fields=[("RECORD", "NULLABLE")]),
+            "csv",
+            "gs://foo/a.csv",
+            False,
+        ),
+        (
+            make_bigquery_table(fields=[("STRING", "REPEATED")]),
+            "csv",
+            "gs://foo/a.csv",
+            False,
+        ),
+        (
+            make_bigquery_table(fields=[("RECORD", "NULLABLE")]),
+            "parquet",
+            "gs://foo/a.parquet",
+            True,
+        ),
+        (make_bigquery_table(), "parquet", "gs://foo/a.parquet.gz", False),
+        (make_bigquery_table(), "csv", "gs://foo/a.csv.bz2", False),
+    ],
+)
+@unittest.mock.patch("astro.sql.operators.agnostic_save_file.BigQueryHook")
+def test_bigquery_export_to_gcs_fallback(
+    hook_class, table, output_file_format, output_file_path, exported
+):
+    client = hook_class.return_value.get_client.return_value
+    client.get_table.return_value = table
+    operator = SaveFile(task_id="save_file", output_file_format=output_file_format)
+
+    assert (
+        operator.bigquery_export_to_gcs("bigquery", "tmp_astro.foo", output_file_path)
+        == exported
+    )
+    assert client.extract_table.called == exported
+
+
+@pytest.mark.parametrize(
+    "output_file_path,compression",
+    [("gs://foo/a.csv", None), ("gs://foo/a.csv.gz", "GZIP")],
+)
+@unittest.mock.patch("astro.sql.operators.agnostic_save_file.BigQueryHook")
+def test_bigquery_export_to_gcs_compression(hook_class, output_file_path, compression):
+    client = hook_class.return_value.get_client.return_value
+    client.get_table.return_value = make_bigquery_table()
+    operator = SaveFile(task_id="save_file", output_file_format="csv")
+
+    assert operator.bigquery_export_to_gcs(
+        "bigquery", "tmp_astro.foo", output_file_path
+    )
+    job_config = client.extract_table.call_args[1]["job_config"]
+    assert job_config.compression == compression
+
+
+def write_parquet_to_dataframe(df_chunks, column_types):
+    stream = io.BytesIO()
+    write_parquet_chunks(df_chunks, stream, column_types)
+    return pd.read_parquet(io.BytesIO(stream.getvalue()))
+
+
+def test_write_parquet_chunks_null_first_with_column_types():
+    df_chunks = [
+        pd.DataFrame([{"id": 1, "name": None}]),
+        pd.DataFrame([{"id": 2, "name": "Someone"}]),
+    ]
+    column_types = {"id": pa.int64(), "name": pa.string()}
+
+    df = write_parquet_to_dataframe(df_chunks, column_types)
+    assert df["id"].tolist() == [1, 2]
+    assert pd.isna(df["name"][0])
+    assert df["name"][1] == "Someone"
+
+
+def test_write_parquet_chunks_unmapped_null_first():
+    # e.g. a JSON column, which has no Arrow type from its SQL type
+    df_chunks = [pd.DataFrame([{"j": None}]), pd.DataFrame([{"j": {"a": 1}}])]
+
+    df = write_parquet_to_dataframe(df_chunks, {})
+    assert df["j"][0] is None
+    assert df["j"][1] == {"a": 1}
+
+
+def test_write_parquet_chunks_without_column_types():
+    # Reflection found nothing, so the first chunk would type the column int64
+    df_chunks = [pd.DataFrame([{"x": 1}]), pd.DataFrame([{"x": 1.5}])]
+
+    df = write_parquet_to_dataframe(df_chunks, {})
+    assert df["x"].tolist() == [1, 1.5]
+
+
+def test_get_arrow_column_types_quoted_name():
+    engine = sqlalchemy.create_engine("sqlite://")
+    engine.execute('CREATE TABLE "my_table" (id integer, name varchar(255), j json)')
+
+    assert get_arrow_column_types(engine, '"my_table"') == {
+        "id": pa.int64(),
+        "name": pa.string(),
+    }
+    assert get_arrow_column_types(engine, "missing_table") == {}
@@ -40,9 +40,11 @@ from airflow.utils.session import create_session
 from airflow.utils.state import State
 from airflow.utils.types import DagRunType
 from google.cloud import bigquery
+from sqlalchemy.dialects.postgresql import psycopg2
 
 # Import Operator
 import astro.sql as aql
+from astro.sql.operators.agnostic_sql_append import build_append_statement
 from astro.sql.table import Table
 
 # from tests.operators import utils as test_utils
@@ -357,3 +359,13 @@ class TestPostgresAppend(unittest.TestCase):
         assert len(bigquery_df) == 6
         assert not bigquery_df["sell"].hasnans
         assert not bigquery_df["rooms"].hasnans
+
+
+def test_append_statement_escapes_percent_once():
+    statement = build_append_statement(
+        MAIN_TABLE_NAME, ("id", "b%c"), (("price", "Float"),), APPEND_TABLE_NAME
+    )
+    sql = str(statement.compile(dialect=psycopg2.dialect()))
+    # psycopg2 needs `%` doubled exactly once
+    assert sql.startswith('INSERT INTO test_main (id, "b%%c", price) SELECT id, "b%%c"')
+    assert "%%%%" not in sql
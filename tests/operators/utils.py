@@ -2,12 +2,15 @@ import os
 import time
 
 from airflow.executors.debug_executor import DebugExecutor
+from airflow.models import DagRun
+from airflow.models import TaskInstance as TI
 from airflow.models.taskinstance import State
 from airflow.providers.postgres.hooks.postgres import PostgresHook
 from airflow.providers.snowflake.hooks.snowflake import SnowflakeHook
 from airflow.utils import timezone
 from airflow.utils.state import State
 from airflow.utils.types import DagRunType
+from sqlalchemy import text
 
 DEFAULT_SCHEMA = "tmp_astro"
 DEFAULT_DATE = timezone.datetime(2016, 1, 1)
@@ -77,6 +80,18 @@ def drop_table_postgres(
     postgres_conn.close()
 
 
+def reset_dag_runs(session):
+    """Delete all DAG runs and task instances from the Airflow metadata DB."""
+    if session.bind.dialect.name == "postgresql":
+        session.execute(
+            text("TRUNCATE task_instance, dag_run RESTART IDENTITY CASCADE")
+        )
+    else:
+        # SQLite has no TRUNCATE
+        session.query(DagRun).delete()
+        session.query(TI).delete()
+
+
 def run_dag(dag):
     dag.clear(start_date=DEFAULT_DATE, end_date=DEFAULT_DATE, dag_run_state=State.NONE)
 
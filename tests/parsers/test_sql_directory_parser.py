@@ -1,12 +1,14 @@
+import copy
 import logging
+import os
 import unittest.mock
 
 import pytest
 from airflow.exceptions import AirflowException
-from airflow.models import DAG, DagRun
-from airflow.models import TaskInstance as TI
+from airflow.models import DAG
 from airflow.utils import timezone
 from airflow.utils.session import create_session
+from airflow.utils.task_group import TaskGroup
 
 # Import Operator
 import astro.sql as aql
@@ -15,15 +17,20 @@ from tests.operators import utils as test_utils
 
 log = logging.getLogger(__name__)
 DEFAULT_DATE = timezone.datetime(2016, 1, 1)
-import os
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
 
 
 class TestSQLParsing(unittest.TestCase):
-    def setUp(self):
-        super().setUp()
-        self.dag = DAG(
+    PASSING_DAG = os.path.join(dir_path, "passing_dag")
+    MISSING_TABLE_DAG = os.path.join(dir_path, "missing_table_dag")
+    FRONT_MATTER_DAG = os.path.join(dir_path, "front_matter_dag")
+    SINGLE_TASK_DAG = os.path.join(dir_path, "single_task_dag")
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._template_dag = DAG(
             "test_dag",
             default_args={
                 "owner": "airflow",
@@ -31,15 +38,21 @@ class TestSQLParsing(unittest.TestCase):
             },
         )
 
+    def setUp(self):
+        super().setUp()
+        # Reuse the validated DAG, giving each test its own empty set of tasks
+        self.dag = copy.copy(self._template_dag)
+        self.dag.task_dict = {}
+        self.dag._task_group = TaskGroup.create_root(self.dag)
+
     def tearDown(self):
         super().tearDown()
         with create_session() as session:
-            session.query(DagRun).delete()
-            session.query(TI).delete()
+            test_utils.reset_dag_runs(session)
 
     def test_parse(self):
         with self.dag:
-            rendered_tasks = aql.render(dir_path + "/passing_dag")
+            rendered_tasks = aql.render(self.PASSING_DAG)
 
         assert (
             rendered_tasks.get("agg_orders")
@@ -57,12 +70,12 @@ class TestSQLParsing(unittest.TestCase):
     def test_parse_missing_table(self):
         with pytest.raises(AirflowException):
             with self.dag:
-                rendered_tasks = aql.render(dir_path + "/missing_table_dag")
+                rendered_tasks = aql.render(self.MISSING_TABLE_DAG)
 
     def test_parse_missing_table_with_inputs(self):
         with self.dag:
             rendered_tasks = aql.render(
-                dir_path + "/missing_table_dag",
+                self.MISSING_TABLE_DAG,
                 agg_orders=Table("foo"),
                 customers_table=Table("customers_table"),
             )
@@ -71,14 +84,14 @@ class TestSQLParsing(unittest.TestCase):
         with self.dag:
             agg_orders = aql.load_file("s3://foo")
             rendered_tasks = aql.render(
-                dir_path + "/missing_table_dag",
+                self.MISSING_TABLE_DAG,
                 agg_orders=agg_orders,
                 customers_table=Table("customers_table"),
             )
 
     def test_parse_frontmatter(self):
         with self.dag:
-            rendered_tasks = aql.render(dir_path + "/front_matter_dag")
+            rendered_tasks = aql.render(self.FRONT_MATTER_DAG)
         customers_table_task = rendered_tasks.get("customers_table")
         assert customers_table_task
         assert customers_table_task.operator.database == "foo"
@@ -106,6 +119,30 @@ class TestSQLParsing(unittest.TestCase):
         :return:
         """
         with self.dag:
-            rendered_tasks = aql.render(dir_path + "/single_task_dag")
+            rendered_tasks = aql.render(self.SINGLE_TASK_DAG)
 
         test_utils.run_dag(self.dag)
+
+
+def test_parse_picks_up_edited_files(tmp_path):
+    """Editing a SQL file must invalidate render's parse cache."""
+    sql_file = tmp_path / "agg_orders.sql"
+    default_args = {"owner": "airflow", "start_date": DEFAULT_DATE}
+
+    sql_file.write_text("SELECT * FROM orders")
+    with DAG("test_dag_1", default_args=default_args):
+        rendered_tasks = aql.render(str(tmp_path))
+    assert rendered_tasks["agg_orders"].operator.sql == "SELECT * FROM orders"
+
+    # Same size and mtime, so only the content tells the edit apart
+    stat = sql_file.stat()
+    sql_file.write_text("SELECT * FROM orderz")
+    os.utime(sql_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    with DAG("test_dag_2", default_args=default_args):
+        rendered_tasks = aql.render(str(tmp_path))
+    assert rendered_tasks["agg_orders"].operator.sql == "SELECT * FROM orderz"
+
+    sql_file.write_text("---\ndatabase: foo\n---\nSELECT * FROM orderz")
+    with DAG("test_dag_3", default_args=default_args):
+        rendered_tasks = aql.render(str(tmp_path))
+    assert rendered_tasks["agg_orders"].operator.database == "foo"